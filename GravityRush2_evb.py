@@ -2,38 +2,72 @@
 # Gravity Rush 2 .evb File Parser
 # This script parses .evb (database) files and prints all extracted information
 
+import argparse
+import os
+import pickle
 import sys
+import mmap
 import struct
-from io import BytesIO
-from typing import List, Dict, Any
+from array import array
+from typing import List, Optional, Tuple
 
 DEBUG = False
 GLOBAL_SCALE = 100
 
+# Precompiled little-endian layouts
+_U32 = struct.Struct('<I')
+_BONE_XFORM = struct.Struct('<4f3f4x3f')  # rotation, translation, skip 4, scale
+_SUBHDR = struct.Struct('<8xI12xI')  # name pointer at 0x08, transform pointer at 0x18
+# Data chunk header: name pointer at 0x08, sub chunk count at 0x30, sub index
+# pointer at 0x34, root bone transform at 0x50, parent name pointer at 0x94
+_CHUNKHDR = struct.Struct('<8xI36xII24x4f3f4x3f24xI')
+
 class EVBParser:
     """Parser for Gravity Rush 2 .evb database files"""
     
     def __init__(self, file_path: str):
         self.file_path = file_path
         self.data = None
-        self.stream = None
-        self.bones: List[Dict[str, Any]] = []
+        # Bones are stored as parallel arrays (one entry per bone);
+        # rot/trn/scl are flat float32 arrays with 4/3/3 components per bone.
+        # trn holds the raw file values: GLOBAL_SCALE is applied when they are
+        # formatted or dumped, so float32 storage never rounds a scaled value
+        self.names: List[str] = []
+        self.parent_index = array('i')
+        self.parent_names: List[Optional[str]] = []
+        self.rot = array('f')
+        self.trn = array('f')
+        self.scl = array('f')
+        # Per-chunk trace lines, only collected when DEBUG is set
+        self._log: List[str] = []
         
     def load_file(self) -> bool:
-        """Load the .evb file into memory"""
+        """Map the .evb file and validate its header before anything else is read"""
         try:
             with open(self.file_path, 'rb') as f:
-                self.data = f.read()
-            self.stream = BytesIO(self.data)
+                size = os.fstat(f.fileno()).st_size
+                # mmap cannot map an empty file; check_type rejects it below
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
             print(f"[INFO] Loaded file: {self.file_path}")
-            print(f"[INFO] File size: {len(self.data)} bytes")
-            return True
+            print(f"[INFO] File size: {size} bytes")
         except FileNotFoundError:
             print(f"[ERROR] File not found: {self.file_path}")
             return False
         except Exception as e:
             print(f"[ERROR] Failed to load file: {e}")
             return False
+        
+        # Only the first page is touched here; the rest is paged in while parsing
+        if not self.check_type():
+            self.close()
+            return False
+        return True
+    
+    def close(self):
+        """Release the file mapping"""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
     
     def check_type(self) -> bool:
         """Check if file is valid .evb format (header should be 'FBKK')"""
@@ -51,243 +85,226 @@ class EVBParser:
             print(f"[WARNING] Expected 'FBKK' header, got '{header}'")
             return False
     
-    def read_uint(self) -> int:
+    def _unpack_at(self, layout: struct.Struct, abs_offset: int, what: str) -> tuple:
+        """Unpack a precompiled layout at an absolute offset"""
+        if abs_offset < 0 or abs_offset + layout.size > len(self.data):
+            raise EOFError(f"Not enough data to read {what}")
+        return layout.unpack_from(self.data, abs_offset)
+    
+    def read_uint(self, abs_offset: int) -> int:
         """Read 4 bytes as unsigned integer (little-endian)"""
-        data = self.stream.read(4)
-        if len(data) < 4:
-            raise EOFError("Not enough data to read uint")
-        return struct.unpack('<I', data)[0]
+        v, = self._unpack_at(_U32, abs_offset, "uint")
+        return v
     
-    def read_bytes(self, count: int) -> bytes:
-        """Read specified number of bytes"""
-        data = self.stream.read(count)
-        if len(data) < count:
-            raise EOFError(f"Not enough data to read {count} bytes")
-        return data
+    def read_pointer(self, abs_offset: int) -> int:
+        """Resolve the self-relative pointer stored at abs_offset to an absolute offset"""
+        return abs_offset + self.read_uint(abs_offset)
     
-    def read_float(self) -> float:
-        """Read 4 bytes as float (little-endian)"""
-        data = self.stream.read(4)
-        if len(data) < 4:
-            raise EOFError("Not enough data to read float")
-        return struct.unpack('<f', data)[0]
+    def read_uint_array(self, abs_offset: int, count: int) -> Tuple[int, ...]:
+        """Read `count` consecutive unsigned integers in a single unpack"""
+        if abs_offset < 0 or abs_offset + 4 * count > len(self.data):
+            raise EOFError(f"Not enough data to read {count} uints")
+        return struct.unpack_from(f'<{count}I', self.data, abs_offset)
     
-    def read_vec3(self) -> Dict[str, float]:
-        """Read 3D vector (3 floats)"""
-        x = self.read_float()
-        y = self.read_float()
-        z = self.read_float()
-        return {'x': x, 'y': y, 'z': z}
+    def read_bone_xform(self, abs_offset: int) -> Tuple[float, ...]:
+        """Read rotation (xyzw), translation (xyz) and scale (xyz) in a single unpack"""
+        return self._unpack_at(_BONE_XFORM, abs_offset, "bone transform")
     
-    def read_quat(self) -> Dict[str, float]:
-        """Read quaternion (4 floats)"""
-        x = self.read_float()
-        y = self.read_float()
-        z = self.read_float()
-        w = self.read_float()
-        return {'x': x, 'y': y, 'z': z, 'w': w}
+    @property
+    def bone_count(self) -> int:
+        """Number of bones parsed so far"""
+        return len(self.names)
     
-    def seek(self, offset: int, whence: int = 0):
-        """Seek to position in stream"""
-        self.stream.seek(offset, whence)
+    def add_bone(self, name: str, parent_index: int, parent_name: Optional[str], xform: Tuple[float, ...]) -> int:
+        """Append a bone to the parallel arrays and return its index"""
+        index = len(self.names)
+        self.names.append(name)
+        self.parent_index.append(parent_index)
+        self.parent_names.append(parent_name)
+        self.rot.extend(xform[0:4])
+        self.trn.extend(xform[4:7])
+        self.scl.extend(xform[7:10])
+        return index
     
-    def tell(self) -> int:
-        """Get current position in stream"""
-        return self.stream.tell()
+    def scaled_translations(self) -> array:
+        """Return all translations multiplied by GLOBAL_SCALE, at double precision"""
+        return array('d', [v * GLOBAL_SCALE for v in self.trn])
     
-    def load_string_from_pointer(self, offset: int) -> str:
-        """Load a null-terminated string from the given offset"""
-        original_offset = self.tell()
-        try:
-            self.seek(offset - 4, 1)  # Relative seek
-            string_bytes = self.read_bytes(64)
-            string = string_bytes.split(b'\x00')[0].decode('UTF-8', errors='ignore')
-            return string
-        finally:
-            self.seek(original_offset, 0)  # Absolute seek
+    def _flush_log(self):
+        """Write collected trace lines to stdout in a single call"""
+        if self._log:
+            sys.stdout.write(''.join(self._log))
+            self._log.clear()
     
-    def read_sub_data_chunk(self, offset: int, parent_bone_index: int, parent_name: str = ""):
-        """Read and parse sub data chunk"""
-        original_offset = self.tell()
-        try:
-            self.seek(offset - 4, 1)  # Relative seek
-            current_pos = self.tell()
-            print(f"\n[SUB_DATA_CHUNK] Loading at offset 0x{current_pos:X}")
-            
-            self.seek(0x08, 1)  # Skip 8 bytes
-            name = self.load_string_from_pointer(self.read_uint())
-            print(f"  [NAME] {name}")
-            
-            self.seek(0x0C, 1)  # Skip 12 bytes
-            self.seek(self.read_uint() - 4, 1)
-            
-            # Read bone transformation data
-            rotation = self.read_quat()
-            translation = self.read_vec3()
-            translation_scaled = {
-                'x': translation['x'] * GLOBAL_SCALE,
-                'y': translation['y'] * GLOBAL_SCALE,
-                'z': translation['z'] * GLOBAL_SCALE,
-            }
-            
-            self.seek(4, 1)  # Skip 4 bytes
-            scale = self.read_vec3()
-            
-            print(f"  [ROTATION] x={rotation['x']:.6f}, y={rotation['y']:.6f}, z={rotation['z']:.6f}, w={rotation['w']:.6f}")
-            print(f"  [TRANSLATION] x={translation_scaled['x']:.6f}, y={translation_scaled['y']:.6f}, z={translation_scaled['z']:.6f}")
-            print(f"  [SCALE] x={scale['x']:.6f}, y={scale['y']:.6f}, z={scale['z']:.6f}")
-            print(f"  [PARENT_BONE_INDEX] {parent_bone_index}")
-            print(f"  [PARENT_NAME] {parent_name}")
-            
-            bone_data = {
-                'index': len(self.bones),
-                'name': name,
-                'parent_index': parent_bone_index,
-                'parent_name': parent_name,
-                'rotation': rotation,
-                'translation': translation_scaled,
-                'scale': scale,
-            }
-            self.bones.append(bone_data)
-            
-        finally:
-            self.seek(original_offset, 0)  # Absolute seek
+    def read_cstring(self, abs_offset: int) -> str:
+        """Read a null-terminated string starting at an absolute offset"""
+        if abs_offset < 0 or abs_offset >= len(self.data):
+            raise EOFError(f"String offset 0x{abs_offset:X} is outside the file")
+        end = self.data.find(b'\x00', abs_offset)
+        if end < 0:
+            end = len(self.data)
+        return self.data[abs_offset:end].decode('UTF-8', errors='ignore')
     
-    def read_data_chunk(self, offset: int):
-        """Read and parse data chunk"""
-        original_offset = self.tell()
-        try:
-            self.seek(offset - 4, 1)  # Relative seek
-            current_pos = self.tell()
-            print(f"\n[DATA_CHUNK] Loading at offset 0x{current_pos:X}")
-            
-            self.seek(0x08, 1)  # Skip 8 bytes
-            name = self.load_string_from_pointer(self.read_uint())
-            print(f"  [NAME] {name}")
-            
-            self.seek(0x24, 1)  # Skip 36 bytes
-            subdata_chunk_count = self.read_uint()
-            subindex_chunk_location = self.tell() + self.read_uint()
-            print(f"  [SUBDATA_CHUNK_COUNT] {subdata_chunk_count}")
-            print(f"  [SUBINDEX_CHUNK_LOCATION] 0x{subindex_chunk_location:X}")
-            
-            self.seek(0x18, 1)  # Skip 24 bytes
-            
-            # Read root bone transformation data
-            rotation = self.read_quat()
-            translation = self.read_vec3()
-            translation_scaled = {
-                'x': translation['x'] * GLOBAL_SCALE,
-                'y': translation['y'] * GLOBAL_SCALE,
-                'z': translation['z'] * GLOBAL_SCALE,
-            }
-            
-            self.seek(4, 1)  # Skip 4 bytes
-            scale = self.read_vec3()
-            
-            print(f"  [ROOT_ROTATION] x={rotation['x']:.6f}, y={rotation['y']:.6f}, z={rotation['z']:.6f}, w={rotation['w']:.6f}")
-            print(f"  [ROOT_TRANSLATION] x={translation_scaled['x']:.6f}, y={translation_scaled['y']:.6f}, z={translation_scaled['z']:.6f}")
-            print(f"  [ROOT_SCALE] x={scale['x']:.6f}, y={scale['y']:.6f}, z={scale['z']:.6f}")
-            
-            bone_index = len(self.bones)
-            bone_data = {
-                'index': bone_index,
-                'name': name,
-                'parent_index': -1,
-                'parent_name': None,
-                'rotation': rotation,
-                'translation': translation_scaled,
-                'scale': scale,
-            }
-            self.bones.append(bone_data)
-            
-            self.seek(0x18, 1)  # Skip 24 bytes
-            parent_name = self.load_string_from_pointer(self.read_uint())
-            print(f"  [PARENT_NAME] {parent_name}")
-            self.bones[-1]['parent_name'] = parent_name
-            
-            # Read sub data chunks
-            self.seek(subindex_chunk_location, 0)  # Absolute seek
-            for sub_index in range(subdata_chunk_count):
-                sub_offset = self.read_uint()
-                print(f"  [SUB_INDEX] {sub_index}: offset=0x{sub_offset:X}")
-                self.read_sub_data_chunk(sub_offset, bone_index, name)
-            
-        finally:
-            self.seek(original_offset, 0)  # Absolute seek
+    def load_string_from_pointer(self, abs_offset: int) -> str:
+        """Load the null-terminated string referenced by the pointer at abs_offset"""
+        return self.read_cstring(self.read_pointer(abs_offset))
+    
+    def read_sub_data_chunk(self, abs_offset: int, parent_bone_index: int, parent_name: str = ""):
+        """Read and parse the sub data chunk starting at an absolute offset"""
+        # Both pointers are relative to their own position in the header
+        name_rel, xform_rel = self._unpack_at(_SUBHDR, abs_offset, "sub data chunk header")
+        name = self.read_cstring(abs_offset + 0x08 + name_rel)
+        
+        # Read bone transformation data
+        xform = self.read_bone_xform(abs_offset + 0x18 + xform_rel)
+        
+        if DEBUG:
+            rx, ry, rz, rw, tx, ty, tz, sx, sy, sz = xform
+            self._log.append(
+                f"\n[SUB_DATA_CHUNK] Loading at offset 0x{abs_offset:X}\n"
+                f"  [NAME] {name}\n"
+                f"  [ROTATION] x={rx:.6f}, y={ry:.6f}, z={rz:.6f}, w={rw:.6f}\n"
+                f"  [TRANSLATION] x={tx * GLOBAL_SCALE:.6f}, y={ty * GLOBAL_SCALE:.6f}, z={tz * GLOBAL_SCALE:.6f}\n"
+                f"  [SCALE] x={sx:.6f}, y={sy:.6f}, z={sz:.6f}\n"
+                f"  [PARENT_BONE_INDEX] {parent_bone_index}\n"
+                f"  [PARENT_NAME] {parent_name}\n"
+            )
+        
+        self.add_bone(name, parent_bone_index, parent_name, xform)
+    
+    def read_data_chunk(self, abs_offset: int):
+        """Read and parse the data chunk starting at an absolute offset"""
+        header = self._unpack_at(_CHUNKHDR, abs_offset, "data chunk header")
+        name_rel, subdata_chunk_count, subindex_rel = header[0:3]
+        xform = header[3:13]  # root bone transformation data
+        parent_name_rel = header[13]
+        
+        # Pointers are relative to their own position in the header
+        name = self.read_cstring(abs_offset + 0x08 + name_rel)
+        subindex_chunk_location = abs_offset + 0x34 + subindex_rel
+        parent_name = self.read_cstring(abs_offset + 0x94 + parent_name_rel)
+        bone_index = self.add_bone(name, -1, parent_name, xform)
+        
+        if DEBUG:
+            rx, ry, rz, rw, tx, ty, tz, sx, sy, sz = xform
+            self._log.append(
+                f"\n[DATA_CHUNK] Loading at offset 0x{abs_offset:X}\n"
+                f"  [NAME] {name}\n"
+                f"  [SUBDATA_CHUNK_COUNT] {subdata_chunk_count}\n"
+                f"  [SUBINDEX_CHUNK_LOCATION] 0x{subindex_chunk_location:X}\n"
+                f"  [ROOT_ROTATION] x={rx:.6f}, y={ry:.6f}, z={rz:.6f}, w={rw:.6f}\n"
+                f"  [ROOT_TRANSLATION] x={tx * GLOBAL_SCALE:.6f}, y={ty * GLOBAL_SCALE:.6f}, z={tz * GLOBAL_SCALE:.6f}\n"
+                f"  [ROOT_SCALE] x={sx:.6f}, y={sy:.6f}, z={sz:.6f}\n"
+                f"  [PARENT_NAME] {parent_name}\n"
+            )
+        
+        # Read sub data chunks; offsets are relative to their own table slot
+        sub_offsets = self.read_uint_array(subindex_chunk_location, subdata_chunk_count)
+        for sub_index, sub_offset in enumerate(sub_offsets):
+            if DEBUG:
+                self._log.append(f"  [SUB_INDEX] {sub_index}: offset=0x{sub_offset:X}\n")
+            self.read_sub_data_chunk(subindex_chunk_location + 4 * sub_index + sub_offset, bone_index, name)
     
     def parse(self) -> bool:
         """Parse the .evb file"""
         try:
-            if not self.check_type():
-                return False
-            
             print("\n[PARSING] Starting EVB file parsing...")
             
             # Read file header information
-            self.seek(0x38, 0)  # Absolute seek
-            file_name = self.load_string_from_pointer(self.read_uint())
+            file_name = self.load_string_from_pointer(0x38)
             print(f"\n[FILE_NAME] {file_name}")
             
-            self.seek(0x24, 1)  # Relative seek
-            num_of_data_chunk = self.read_uint()
+            num_of_data_chunk = self.read_uint(0x60)
             print(f"[DATA_CHUNK_COUNT] {num_of_data_chunk}")
             
-            # Read data chunk offsets
-            self.seek(self.read_uint() - 4, 1)  # Relative seek
-            for chunk_index in range(num_of_data_chunk):
-                chunk_offset = self.read_uint()
-                print(f"\n[CHUNK] {chunk_index}: offset=0x{chunk_offset:X}")
-                self.read_data_chunk(chunk_offset)
+            # Read data chunk offsets; each is relative to its own table slot
+            table_pos = self.read_pointer(0x64)
+            chunk_offsets = self.read_uint_array(table_pos, num_of_data_chunk)
+            for chunk_index, chunk_offset in enumerate(chunk_offsets):
+                if DEBUG:
+                    self._log.append(f"\n[CHUNK] {chunk_index}: offset=0x{chunk_offset:X}\n")
+                self.read_data_chunk(table_pos + 4 * chunk_index + chunk_offset)
             
+            self._flush_log()
             print("\n" + "="*60)
             print("[PARSING_COMPLETE] Parsing finished")
             print("="*60)
             return True
             
         except Exception as e:
+            self._flush_log()
             print(f"\n[ERROR] Exception during parsing: {e}")
             if DEBUG:
                 import traceback
                 traceback.print_exc()
             return False
     
+    def dump(self, path: str):
+        """Write the parsed bones to `path` as a pickle for downstream tools"""
+        payload = {
+            'names': self.names,
+            'parent_index': self.parent_index,
+            'parent_names': self.parent_names,
+            'rotation': self.rot,
+            'translation': self.scaled_translations(),
+            'scale': self.scl,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    
     def print_summary(self):
         """Print summary of all parsed bones"""
-        print("\n" + "="*60)
-        print("[SUMMARY] All Bones Information")
-        print("="*60)
+        lines = ["\n" + "="*60 + "\n", "[SUMMARY] All Bones Information\n", "="*60 + "\n"]
         
-        for bone in self.bones:
-            print(f"\nBone #{bone['index']}: {bone['name']}")
-            print(f"  Parent Index: {bone['parent_index']}")
-            print(f"  Parent Name: {bone['parent_name']}")
-            print(f"  Rotation: x={bone['rotation']['x']:.6f}, y={bone['rotation']['y']:.6f}, z={bone['rotation']['z']:.6f}, w={bone['rotation']['w']:.6f}")
-            print(f"  Translation: x={bone['translation']['x']:.6f}, y={bone['translation']['y']:.6f}, z={bone['translation']['z']:.6f}")
-            print(f"  Scale: x={bone['scale']['x']:.6f}, y={bone['scale']['y']:.6f}, z={bone['scale']['z']:.6f}")
+        rot, trn, scl = self.rot, self.trn, self.scl
+        for i in range(self.bone_count):
+            r, t, s = 4 * i, 3 * i, 3 * i
+            lines.append(
+                f"\nBone #{i}: {self.names[i]}\n"
+                f"  Parent Index: {self.parent_index[i]}\n"
+                f"  Parent Name: {self.parent_names[i]}\n"
+                f"  Rotation: x={rot[r]:.6f}, y={rot[r + 1]:.6f}, z={rot[r + 2]:.6f}, w={rot[r + 3]:.6f}\n"
+                f"  Translation: x={trn[t] * GLOBAL_SCALE:.6f}, y={trn[t + 1] * GLOBAL_SCALE:.6f}, z={trn[t + 2] * GLOBAL_SCALE:.6f}\n"
+                f"  Scale: x={scl[s]:.6f}, y={scl[s + 1]:.6f}, z={scl[s + 2]:.6f}\n"
+            )
         
-        print(f"\n[SUMMARY] Total bones: {len(self.bones)}")
-        print("="*60)
+        lines.append(f"\n[SUMMARY] Total bones: {self.bone_count}\n")
+        lines.append("="*60 + "\n")
+        sys.stdout.write(''.join(lines))
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python GravityRush2_evb.py <path_to_evb_file>")
-        print("Example: python GravityRush2_evb.py model.evb")
-        sys.exit(1)
+    global DEBUG
+    
+    arg_parser = argparse.ArgumentParser(
+        description="Parse a Gravity Rush 2 .evb file and print or dump its bones",
+        epilog="Example: python GravityRush2_evb.py model.evb --dump model_bones.pkl",
+    )
+    arg_parser.add_argument('evb_file', help="path to the .evb file")
+    arg_parser.add_argument('--dump', metavar='PATH', help="write the bones to PATH as a pickle instead of printing a summary")
+    arg_parser.add_argument('--verbose', action='store_true', help="print per-chunk trace output (same as DEBUG)")
+    args = arg_parser.parse_args()
+    DEBUG = DEBUG or args.verbose
     
-    evb_file = sys.argv[1]
-    parser = EVBParser(evb_file)
+    parser = EVBParser(args.evb_file)
     
-    if parser.load_file():
+    if not parser.load_file():
+        print("\n[FAILURE] Failed to parse EVB file")
+        sys.exit(1)
+    
+    try:
         if parser.parse():
-            parser.print_summary()
+            if args.dump:
+                parser.dump(args.dump)
+                print(f"[INFO] Wrote {parser.bone_count} bones to {args.dump}")
+            else:
+                parser.print_summary()
             print("\n[SUCCESS] EVB file parsed successfully!")
         else:
             print("\n[FAILURE] Failed to parse EVB file")
             sys.exit(1)
-    else:
-        sys.exit(1)
+    finally:
+        parser.close()
 
 
 if __name__ == '__main__':
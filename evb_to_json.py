@@ -1,18 +1,68 @@
 #!/usr/bin/env python3
+import argparse
 import sys
 import json
+import mmap
+import os
 import struct
 import re
-from typing import Any, Dict, List
+from itertools import islice
+from typing import Any, Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: fall back to the regex scan
+    np = None
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib json module
+    orjson = None
+
+_PRINT_SHORT = re.compile(rb"[ -~]{1,64}")
+_PRINT_LONG = re.compile(rb"[ -~]{4,}")
+_MIN_STRING_LEN = 4
+
+
+def _printable_runs(
+    data: bytes | mmap.mmap, min_len: int = _MIN_STRING_LEN, limit: int | None = None
+) -> List[Tuple[int, int]]:
+    """Return up to `limit` (start, end) spans of printable-ASCII runs of at least `min_len` bytes."""
+    if np is None:
+        pattern = _PRINT_LONG if min_len == _MIN_STRING_LEN else re.compile(rb"[ -~]{%d,}" % min_len)
+        return [m.span() for m in islice(pattern.finditer(data), limit)]
+
+    arr = np.frombuffer(data, dtype=np.uint8)
+    mask = (arr >= 0x20) & (arr <= 0x7E)
+    # +1 where a run starts, -1 one past where it ends
+    edges = np.flatnonzero(np.diff(mask.view(np.int8), prepend=0, append=0))
+    starts = edges[0::2]
+    ends = edges[1::2]
+    keep = (ends - starts) >= min_len
+    return list(zip(starts[keep][:limit].tolist(), ends[keep][:limit].tolist()))
 
 
 class EVBParser:
-    def __init__(self, data: bytes):
+    def __init__(
+        self,
+        data: bytes | mmap.mmap,
+        min_string_len: int = _MIN_STRING_LEN,
+        max_strings: int | None = None,
+    ):
         self.data = data
         self.header: str | None = None
         self.header_words: List[int] = []
         self.header_string_refs: List[Dict[str, Any]] = []
-        self.strings: List[Dict[str, Any]] = []
+        self.min_string_len = min_string_len
+        self.max_strings = max_strings
+        self._strings: List[Dict[str, Any]] | None = None
+
+    @property
+    def strings(self) -> List[Dict[str, Any]]:
+        """Printable-ASCII runs in the file, scanned on first access."""
+        if self._strings is None:
+            self._strings = self._scan_strings(self.max_strings, self.min_string_len)
+        return self._strings
 
     def check_type(self) -> None:
         if len(self.data) < 4:
@@ -25,21 +75,17 @@ class EVBParser:
     def parse(self) -> None:
         self.check_type()
 
-        words: List[int] = []
-        header_limit = min(len(self.data), 0x80)
-        for offset in range(4, header_limit, 4):
-            chunk = self.data[offset : offset + 4]
-            if len(chunk) < 4:
-                break
-            words.append(struct.unpack("<I", chunk)[0])
-        self.header_words = words
+        data_len = len(self.data)
+        header_limit = min(data_len, 0x80)
+        words = struct.unpack_from(f"<{(header_limit - 4) // 4}I", self.data, 4)
+        self.header_words = list(words)
 
+        # Resolve header words that point at printable text in the same pass;
+        # match() with pos/endpos scans the buffer in place without slicing it
         header_string_refs: List[Dict[str, Any]] = []
-        for index, value in enumerate(self.header_words):
-            if 0 <= value < len(self.data):
-                end = min(len(self.data), value + 64)
-                chunk = self.data[value:end]
-                m = re.match(rb"[ -~]{1,64}", chunk)
+        for index, value in enumerate(words):
+            if value < data_len:
+                m = _PRINT_SHORT.match(self.data, value, min(data_len, value + 64))
                 if m:
                     raw = m.group(0)
                     text = raw.decode("utf-8", errors="ignore")
@@ -53,15 +99,20 @@ class EVBParser:
                         )
         self.header_string_refs = header_string_refs
 
-        for match in re.finditer(rb"[ -~]{4,}", self.data):
-            raw = match.group(0)
+    def _scan_strings(
+        self, limit: int | None = None, min_len: int = _MIN_STRING_LEN
+    ) -> List[Dict[str, Any]]:
+        strings: List[Dict[str, Any]] = []
+        for start, end in _printable_runs(self.data, min_len, limit):
+            raw = self.data[start:end]
             text = raw.decode("utf-8", errors="ignore")
-            self.strings.append(
+            strings.append(
                 {
-                    "offset": match.start(),
+                    "offset": start,
                     "value": text,
                 }
             )
+        return strings
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -73,27 +124,58 @@ class EVBParser:
 
 
 def main() -> None:
-    if len(sys.argv) < 3:
-        print("Usage: python evb_to_json.py <input.evb> <output.json>")
-        sys.exit(1)
-
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
+    arg_parser = argparse.ArgumentParser(
+        description="Dump the header and printable strings of an EVB file as JSON."
+    )
+    arg_parser.add_argument("input", help="input .evb file")
+    arg_parser.add_argument("output", help="output .json file")
+    arg_parser.add_argument(
+        "--max-strings",
+        type=int,
+        metavar="N",
+        help="stop after the first N strings",
+    )
+    arg_parser.add_argument(
+        "--min-len",
+        type=int,
+        default=_MIN_STRING_LEN,
+        metavar="N",
+        help=f"minimum length of a printable run (default: {_MIN_STRING_LEN})",
+    )
+    args = arg_parser.parse_args()
+    if args.min_len < 1:
+        arg_parser.error("--min-len must be at least 1")
+    if args.max_strings is not None and args.max_strings < 0:
+        arg_parser.error("--max-strings must not be negative")
+
+    input_path = args.input
+    output_path = args.output
 
     with open(input_path, "rb") as f:
-        data = f.read()
+        # mmap cannot map an empty file; let check_type reject it instead
+        if os.fstat(f.fileno()).st_size == 0:
+            data = b""
+        else:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    parser = EVBParser(data)
+    parser = EVBParser(data, min_string_len=args.min_len, max_strings=args.max_strings)
     try:
         parser.parse()
+        # strings are scanned lazily, so build the result while data is still mapped
+        result = parser.to_dict()
     except Exception as exc:
         print(f"Failed to parse EVB file: {exc}")
         sys.exit(1)
-
-    result = parser.to_dict()
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, ensure_ascii=False, indent=2)
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+    if orjson is not None:
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(result, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
 
 
 if __name__ == "__main__":
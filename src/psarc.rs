@@ -1,5 +1,5 @@
 use byteorder::{BigEndian, ReadBytesExt, WriteBytesExt};
-use flate2::read::ZlibDecoder;
+use flate2::{Decompress, FlushDecompress, Status};
 use flate2::Compression;
 use flate2::write::ZlibEncoder;
 use md5::{Digest, Md5};
@@ -14,6 +14,8 @@ use std::time::Instant;
 use walkdir::WalkDir;
 
 const BLOCK_SIZE: usize = 65536; // 64KB
+const TOC_HEADER_SIZE: usize = 32;
+const TOC_ENTRY_SIZE: usize = 30;
 
 /// Packing mode for PSARC creation
 #[derive(Debug, Clone, Copy, PartialEq, Eq)]
@@ -488,6 +490,55 @@ fn read_cached_file_data(
     })
 }
 
+/// Decode a 5-byte big-endian field (TOC sizes and offsets are 40-bit)
+fn be_u40(bytes: &[u8]) -> u64 {
+    let mut widened = [0u8; 8];
+    widened[3..].copy_from_slice(&bytes[..5]);
+    u64::from_be_bytes(widened)
+}
+
+/// Parse the TOC entries and ZSizes table that follow the 32-byte header.
+///
+/// Both tables are sliced straight out of the mapped archive and decoded in
+/// fixed-size chunks instead of field by field through a cursor.
+fn parse_toc(data: &[u8], toc_length: u32, file_count: u32) -> io::Result<(Vec<Entry>, Vec<u16>)> {
+    let entries_end = TOC_HEADER_SIZE + file_count as usize * TOC_ENTRY_SIZE;
+    let toc_end = toc_length as usize;
+    if entries_end > toc_end || toc_end > data.len() {
+        return Err(io::Error::new(
+            io::ErrorKind::InvalidData,
+            format!(
+                "TOC length {} cannot hold {} entries (file size {})",
+                toc_length, file_count, data.len()
+            ),
+        ));
+    }
+
+    let entries: Vec<Entry> = data[TOC_HEADER_SIZE..entries_end]
+        .chunks_exact(TOC_ENTRY_SIZE)
+        .map(|raw| {
+            let mut name_hash = [0u8; 16];
+            name_hash.copy_from_slice(&raw[0..16]);
+            let zsize_index = u32::from_be_bytes([raw[16], raw[17], raw[18], raw[19]]);
+            let uncompressed_size = be_u40(&raw[20..25]);
+            let offset = be_u40(&raw[25..30]);
+            Entry {
+                name_hash,
+                zsize_index,
+                uncompressed_size,
+                offset,
+            }
+        })
+        .collect();
+
+    let zsizes: Vec<u16> = data[entries_end..toc_end]
+        .chunks_exact(2)
+        .map(|pair| u16::from_be_bytes([pair[0], pair[1]]))
+        .collect();
+
+    Ok((entries, zsizes))
+}
+
 /// Load cache from existing PSARC file for incremental packing
 fn load_psarc_cache(psarc_path: &Path) -> io::Result<HashMap<[u8; 16], CachedFileData>> {
     let file = File::open(psarc_path)?;
@@ -516,38 +567,8 @@ fn load_psarc_cache(psarc_path: &Path) -> io::Result<HashMap<[u8; 16], CachedFil
     let block_size = reader.read_u32::<BigEndian>()?;
     let _flags = reader.read_u32::<BigEndian>()?;
 
-    // Read TOC entries
-    let mut entries: Vec<Entry> = Vec::with_capacity(file_count as usize);
-    for _ in 0..file_count {
-        let mut name_hash = [0u8; 16];
-        reader.read_exact(&mut name_hash)?;
-        let zsize_index = reader.read_u32::<BigEndian>()?;
-
-        let uncompressed_size_high = reader.read_u8()?;
-        let uncompressed_size_low = reader.read_u32::<BigEndian>()?;
-        let uncompressed_size = ((uncompressed_size_high as u64) << 32) | (uncompressed_size_low as u64);
-
-        let offset_high = reader.read_u8()?;
-        let offset_low = reader.read_u32::<BigEndian>()?;
-        let offset = ((offset_high as u64) << 32) | (offset_low as u64);
-
-        entries.push(Entry {
-            name_hash,
-            zsize_index,
-            uncompressed_size,
-            offset,
-        });
-    }
-
-    // Read ZSizes table
-    let zsizes_start = reader.position() as usize;
-    let zsizes_count = (toc_length as usize - 32 - (file_count as usize * 30)) / 2;
-    let zsizes: Vec<u16> = (0..zsizes_count)
-        .map(|i| {
-            let pos = zsizes_start + (i * 2);
-            u16::from_be_bytes([mmap[pos], mmap[pos + 1]])
-        })
-        .collect();
+    // Read TOC entries and ZSizes table
+    let (entries, zsizes) = parse_toc(&mmap, toc_length, file_count)?;
 
     // Build cache map
     let mut cache = HashMap::new();
@@ -1152,38 +1173,8 @@ where
     let block_size = reader.read_u32::<BigEndian>()?;
     let _flags = reader.read_u32::<BigEndian>()?;
 
-    // Read TOC entries
-    let mut entries: Vec<Entry> = Vec::with_capacity(file_count as usize);
-    for _ in 0..file_count {
-        let mut name_hash = [0u8; 16];
-        reader.read_exact(&mut name_hash)?;
-        let zsize_index = reader.read_u32::<BigEndian>()?;
-
-        let uncompressed_size_high = reader.read_u8()?;
-        let uncompressed_size_low = reader.read_u32::<BigEndian>()?;
-        let uncompressed_size = ((uncompressed_size_high as u64) << 32) | (uncompressed_size_low as u64);
-
-        let offset_high = reader.read_u8()?;
-        let offset_low = reader.read_u32::<BigEndian>()?;
-        let offset = ((offset_high as u64) << 32) | (offset_low as u64);
-
-        entries.push(Entry {
-            name_hash,
-            zsize_index,
-            uncompressed_size,
-            offset,
-        });
-    }
-
-    // Read ZSizes table
-    let zsizes_start = reader.position() as usize;
-    let zsizes_count = (toc_length as usize - 32 - (file_count as usize * 30)) / 2;
-    let zsizes: Vec<u16> = (0..zsizes_count)
-        .map(|i| {
-            let pos = zsizes_start + (i * 2);
-            u16::from_be_bytes([mmap[pos], mmap[pos + 1]])
-        })
-        .collect();
+    // Read TOC entries and ZSizes table
+    let (entries, zsizes) = parse_toc(&mmap, toc_length, file_count)?;
 
     // Create output directory
     std::fs::create_dir_all(output_dir)?;
@@ -1346,27 +1337,41 @@ where
     Ok(())
 }
 
-fn read_file_data(
-    mmap: &Mmap,
+/// How a single PSARC block turns back into file data
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+enum BlockKind {
+    /// Copy `out_len` bytes of the block as-is
+    Stored,
+    /// Inflate the block and keep the first `out_len` bytes
+    Zlib,
+}
+
+/// One block of an entry, located in the archive and sized ahead of decoding
+#[derive(Clone, Copy, Debug)]
+struct BlockRead {
+    offset: usize,
+    zsize: u16,
+    compressed_size: usize,
+    out_len: usize,
+    kind: BlockKind,
+}
+
+/// Walk the zsize table for `entry` and work out where each block lives and
+/// how many bytes it contributes, without decoding anything.
+fn plan_file_blocks(
+    data: &[u8],
     entry: &Entry,
     zsizes: &[u16],
     block_size: usize,
-) -> io::Result<Vec<u8>> {
-    let mut result = Vec::with_capacity(entry.uncompressed_size as usize);
+) -> io::Result<Vec<BlockRead>> {
+    let mut blocks = Vec::new();
+    let mut produced = 0u64;
     let mut current_zsize_index = entry.zsize_index as usize;
     let mut current_offset = entry.offset as usize;
     let mut remaining = entry.uncompressed_size as usize;
 
-    // Verify offset is within bounds
-    if current_offset >= mmap.len() {
-        return Err(io::Error::new(
-            io::ErrorKind::InvalidData,
-            format!("Entry offset {} is beyond file size {}", current_offset, mmap.len()),
-        ));
-    }
-
-    // Follow UnPSARC logic: loop until we've written all uncompressed data
-    while (result.len() as u64) < entry.uncompressed_size {
+    // Follow UnPSARC logic: loop until we've accounted for all uncompressed data
+    while produced < entry.uncompressed_size {
         let zsize = zsizes.get(current_zsize_index)
             .ok_or_else(|| io::Error::new(
                 io::ErrorKind::InvalidData,
@@ -1381,30 +1386,26 @@ fn read_file_data(
         };
 
         // Verify we can read the compressed block
-        if current_offset + compressed_size > mmap.len() {
+        if current_offset + compressed_size > data.len() {
             return Err(io::Error::new(
                 io::ErrorKind::InvalidData,
                 format!(
                     "Block read would exceed file bounds: offset {}, size {}, file size {}",
-                    current_offset, compressed_size, mmap.len()
+                    current_offset, compressed_size, data.len()
                 ),
             ));
         }
 
-        let compressed_data = &mmap[current_offset..current_offset + compressed_size];
-        
         // UnPSARC logic for determining how much to read/decompress
-        let decompressed = if compressed_size == entry.uncompressed_size as usize {
+        let (kind, out_len) = if compressed_size == entry.uncompressed_size as usize {
             // Special case: entire file is uncompressed in one block
-            compressed_data.to_vec()
+            (BlockKind::Stored, compressed_size)
         } else if *zsize == 0 {
-            // Uncompressed block
+            // Uncompressed block - the last block only holds the remaining bytes
             if remaining < block_size {
-                // Last block - only read remaining bytes
-                compressed_data[..remaining.min(compressed_data.len())].to_vec()
+                (BlockKind::Stored, remaining.min(compressed_size))
             } else {
-                // Full block
-                compressed_data.to_vec()
+                (BlockKind::Stored, compressed_size)
             }
         } else {
             // Compressed block - determine target size
@@ -1413,39 +1414,31 @@ fn read_file_data(
             } else {
                 block_size
             };
-            
+
             // Check for zlib magic (0x78DA, 0x789C, etc.)
-            let is_zlib = compressed_data.len() >= 2 && 
-                          compressed_data[0] == 0x78 && 
-                          (compressed_data[1] == 0x9C || compressed_data[1] == 0xDA || 
-                           compressed_data[1] == 0x01 || compressed_data[1] == 0x5E);
-            
+            let magic = &data[current_offset..current_offset + compressed_size.min(2)];
+            let is_zlib = magic.len() >= 2 &&
+                          magic[0] == 0x78 &&
+                          (magic[1] == 0x9C || magic[1] == 0xDA ||
+                           magic[1] == 0x01 || magic[1] == 0x5E);
+
             if is_zlib {
-                let mut decoder = ZlibDecoder::new(compressed_data);
-                let mut decompressed_block = Vec::with_capacity(target_size);
-                decoder.read_to_end(&mut decompressed_block)
-                    .map_err(|e| io::Error::new(
-                        io::ErrorKind::InvalidData,
-                        format!(
-                            "Failed to decompress block at offset {} (zsize: {}, compressed_size: {}, target_size: {}): {}",
-                            current_offset, zsize, compressed_size, target_size, e
-                        ),
-                    ))?;
-                
-                // Truncate to target size if needed (UnPSARC reads exactly target_size)
-                if decompressed_block.len() > target_size {
-                    decompressed_block.truncate(target_size);
-                }
-                decompressed_block
+                (BlockKind::Zlib, target_size)
             } else {
-                // Not compressed or unknown format - return as-is (up to target_size)
-                compressed_data[..target_size.min(compressed_data.len())].to_vec()
+                // Not compressed or unknown format - copy as-is (up to target_size)
+                (BlockKind::Stored, target_size.min(compressed_size))
             }
         };
 
-        // Copy the decompressed data
-        result.extend_from_slice(&decompressed);
-        
+        blocks.push(BlockRead {
+            offset: current_offset,
+            zsize: *zsize,
+            compressed_size,
+            out_len,
+            kind,
+        });
+        produced += out_len as u64;
+
         // UnPSARC logic: 
         // - BlockOffset += CompressedSize (compressed size in file)
         // - RemainingSize -= BlockSize (always subtract block_size, not actual read size)
@@ -1454,5 +1447,101 @@ fn read_file_data(
         current_zsize_index += 1;
     }
 
+    Ok(blocks)
+}
+
+/// Decode one planned block into its own slot of the output buffer.
+///
+/// `out` is exactly `block.out_len` bytes long; a zlib block that inflates to
+/// fewer bytes than planned is an error rather than leaving zeros behind.
+fn decode_block(mmap: &[u8], block: &BlockRead, out: &mut [u8]) -> io::Result<()> {
+    let compressed_data = &mmap[block.offset..block.offset + block.compressed_size];
+    match block.kind {
+        BlockKind::Stored => out.copy_from_slice(&compressed_data[..block.out_len]),
+        BlockKind::Zlib => {
+            let block_error = |detail: String| io::Error::new(
+                io::ErrorKind::InvalidData,
+                format!(
+                    "Failed to decompress block at offset {} (zsize: {}, compressed_size: {}, target_size: {}): {}",
+                    block.offset, block.zsize, block.compressed_size, block.out_len, detail
+                ),
+            );
+
+            // Inflate straight into the slot; anything past out_len is dropped
+            // (UnPSARC reads exactly target_size)
+            let mut inflater = Decompress::new(true);
+            loop {
+                let consumed = inflater.total_in() as usize;
+                let written = inflater.total_out() as usize;
+                if written == out.len() {
+                    break;
+                }
+                let status = inflater
+                    .decompress(&compressed_data[consumed..], &mut out[written..], FlushDecompress::Finish)
+                    .map_err(|e| block_error(e.to_string()))?;
+                let no_progress = inflater.total_in() as usize == consumed
+                    && inflater.total_out() as usize == written;
+                if status == Status::StreamEnd || no_progress {
+                    break;
+                }
+            }
+
+            let written = inflater.total_out() as usize;
+            if written < block.out_len {
+                return Err(block_error(format!(
+                    "inflated to {} bytes, expected {}",
+                    written, block.out_len
+                )));
+            }
+        }
+    }
+    Ok(())
+}
+
+fn read_file_data(
+    mmap: &Mmap,
+    entry: &Entry,
+    zsizes: &[u16],
+    block_size: usize,
+) -> io::Result<Vec<u8>> {
+    // Verify offset is within bounds
+    if entry.offset as usize >= mmap.len() {
+        return Err(io::Error::new(
+            io::ErrorKind::InvalidData,
+            format!("Entry offset {} is beyond file size {}", entry.offset, mmap.len()),
+        ));
+    }
+
+    let blocks = plan_file_blocks(mmap, entry, zsizes, block_size)?;
+    let total_len: usize = blocks.iter().map(|block| block.out_len).sum();
+
+    // Stored blocks that sit back to back in the archive are already laid out
+    // exactly like the output, so copy the whole run out of the map at once
+    // instead of zero-filling a buffer and overwriting it block by block
+    let contiguous_stored = blocks.iter().all(|block| block.kind == BlockKind::Stored)
+        && blocks.windows(2).all(|pair| pair[0].offset + pair[0].out_len == pair[1].offset);
+    if contiguous_stored {
+        let start = entry.offset as usize;
+        return Ok(mmap[start..start + total_len].to_vec());
+    }
+
+    let mut result = vec![0u8; total_len];
+
+    // Carve the output into one disjoint slot per block, in archive order
+    let mut slots: Vec<&mut [u8]> = Vec::with_capacity(blocks.len());
+    let mut rest = result.as_mut_slice();
+    for block in &blocks {
+        let (slot, tail) = std::mem::take(&mut rest).split_at_mut(block.out_len);
+        slots.push(slot);
+        rest = tail;
+    }
+
+    // Blocks are independent, so decode them across the rayon pool, each one
+    // writing directly into its own slot
+    blocks
+        .par_iter()
+        .zip(slots)
+        .try_for_each(|(block, slot)| decode_block(mmap, block, slot))?;
+
     Ok(result)
 }